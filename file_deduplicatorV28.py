@@ -2,12 +2,79 @@ import os
 import hashlib
 import argparse
 import unicodedata
-from bisect import bisect_left, bisect_right
-from typing import List, Dict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Tuple, Union
 import json
 import sys
-import pythoncom
 import time
+import functools
+from array import array
+
+try:
+    # 可选依赖：rapidfuzz提供C实现的编辑距离算法，未安装时回退到纯Python实现
+    from rapidfuzz.distance import Levenshtein as _Levenshtein
+except ImportError:
+    _Levenshtein = None
+
+try:
+    # 可选依赖：rapidfuzz.process.cdist 批量计算相似度矩阵（需要numpy）
+    import numpy as np
+    from rapidfuzz import process as _rf_process
+except ImportError:
+    np = None
+    _rf_process = None
+
+try:
+    # 可选依赖：orjson提供原生实现的JSON序列化，未安装时回退到标准库json
+    import orjson
+except ImportError:
+    orjson = None
+
+# 整数置位计数（Python 3.10+ 使用int.bit_count，旧版本回退到字符串计数）
+_popcount = getattr(int, 'bit_count', None) or (lambda x: bin(x).count('1'))
+
+
+class FileRecord:
+    """
+    文件索引中的单条记录
+    说明：
+        使用__slots__固定字段，每条记录不再携带独立的属性字典，
+        百万级文件索引的内存占用明显低于嵌套字典
+    """
+    __slots__ = ('size', 'name_norm', 'hash')
+
+    def __init__(self, size: int, name_norm: str, hash: str = ''):
+        self.size = size
+        self.name_norm = name_norm
+        self.hash = hash
+
+    def __eq__(self, other):
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return (self.size, self.name_norm, self.hash) == (other.size, other.name_norm, other.hash)
+
+    @classmethod
+    def from_dict(cls, info: dict) -> 'FileRecord':
+        """
+        从缓存文件中的字典格式还原记录
+        功能说明：
+            1. 自动处理旧版本缓存格式升级（旧缓存中与size重复的sorted_size字段直接忽略）
+            2. 缺少name_norm字段时由旧缓存的小写主文件名（name字段）补充NFC规范化结果，
+               name字段与name_norm几乎总是相同，新缓存不再保存
+        """
+        name_norm = info.get('name_norm')
+        if name_norm is None:
+            name_norm = unicodedata.normalize('NFC', info.get('name', ''))
+        return cls(info['size'], sys.intern(name_norm), info.get('hash', ''))
+
+    def to_dict(self) -> dict:
+        """转换为缓存文件中的字典格式"""
+        return {
+            'size': self.size,
+            'name_norm': self.name_norm,
+            'hash': self.hash
+        }
 
 
 class FileDeduplicator:
@@ -40,9 +107,6 @@ class FileDeduplicator:
             print(f"创建快捷方式失败: {str(e)}")
             return False
 
-    def __del__(self):
-        """析构函数自动保存哈希缓存"""
-        self._save_hash_cache()
     """
     重复文件检测器核心类
     功能：
@@ -62,18 +126,24 @@ class FileDeduplicator:
         self.duplicate_cache = 'duplicate_cache.json'
         # 文件名相似度阈值（0.0-1.0）
         self.similarity_threshold = 0.9
-        # 文件索引字典 {文件路径: 元数据}
-        self.file_index = self._load_cache(self.file_cache)
-        # 重复文件组缓存
-        self.duplicate_index = self._load_cache(self.duplicate_cache)
+        # 文件索引字典 {文件路径: FileRecord}
+        self.file_index = self._load_file_index()
+        # 文件索引的列式副本及按文件大小分组的行号索引
+        self._rebuild_columns()
+        # 本次运行计算出的重复文件组（删除操作只基于本次结果，不读取上次运行的重复缓存）
+        self.duplicate_index = {}
         # 中断标志位（用于信号处理）
         self.should_stop = False
         # 哈希缓存字典
         self.hash_cache = {}
-
-        # 注册Ctrl+C信号处理器
-        import signal
-        signal.signal(signal.SIGINT, self._handle_interrupt)
+        # 哈希计算线程池（首次哈希校验时创建，见_hash_files）
+        self._hash_executor = None
+        # 文件名相似度LRU缓存，同一对文件名在多次分组计算中只计算一次
+        self._similarity_cache = functools.lru_cache(maxsize=200_000)(self._name_similarity)
+        # Myers算法位掩码表缓存，每个文件名作为模式串只构建一次
+        self._pattern_cache = functools.lru_cache(maxsize=65_536)(self._pattern_masks)
+        # 字符集位图缓存，用于在计算编辑距离前快速排除差异过大的文件名
+        self._bitmap_cache = functools.lru_cache(maxsize=65_536)(self._char_bitmap)
 
     def _handle_interrupt(self, signum, frame):
         """
@@ -92,89 +162,543 @@ class FileDeduplicator:
             cache_file: 缓存文件路径
         返回：
             dict: 加载的缓存数据，失败返回空字典
-        功能说明：
-            1. 自动处理旧版本缓存格式升级
-            2. 新增sorted_size字段用于优化排序比较
         """
         try:
             if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    # 兼容旧版本缓存：添加sorted_size字段
-                    for path, file_info in data.items():
-                        path = unicodedata.normalize('NFC', path)
-                        if 'sorted_size' not in file_info:
-                            # 将原始size复制到sorted_size用于排序比较
-                            file_info['sorted_size'] = file_info['size']
-                    return data
+                with open(cache_file, 'rb') as f:
+                    return self._loads_json(f.read())
+        except Exception as e:
+            print(f"加载缓存失败: {str(e)}")
+        return {}
+
+    def _load_file_index(self) -> Dict[str, FileRecord]:
+        """
+        加载文件索引缓存并转换为FileRecord记录
+        返回：
+            dict: {文件路径: FileRecord}，失败返回空字典
+        """
+        try:
+            return {path: FileRecord.from_dict(info)
+                    for path, info in self._load_cache(self.file_cache).items()}
         except Exception as e:
             print(f"加载缓存失败: {str(e)}")
         return {}
 
+    def _save_file_index(self):
+        """将文件索引以字典格式写入文件缓存"""
+        self._write_json(self.file_cache, {path: rec.to_dict() for path, rec in self.file_index.items()})
+
+    def _rebuild_columns(self):
+        """
+        根据文件索引重建列式存储（SoA）
+        说明：
+            1. 路径、文件名、大小分别存放在并行数组中，按行号连续访问，
+               相似度计算时无需逐个查询文件记录
+            2. 文件名直接取扫描时规范化好的name_norm字段，比较阶段不再重复处理
+            3. _by_size记录 {文件大小: [行号]}，_rows记录 {文件路径: 行号}
+        """
+        self._paths = list(self.file_index)
+        self._names = [rec.name_norm for rec in self.file_index.values()]
+        self._sizes = array('q', (rec.size for rec in self.file_index.values()))
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+        self._by_size = defaultdict(list)
+        for row, size in enumerate(self._sizes):
+            self._by_size[size].append(row)
+
+    def _loads_json(self, data: bytes):
+        """解析UTF-8编码的JSON数据（优先使用orjson）"""
+        if orjson is not None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # 含转义代理字符（非UTF-8文件名）的缓存orjson无法解析，交给标准库
+                pass
+        return json.loads(data)
+
+    def _dumps_json(self, obj, ensure_ascii: bool = True) -> bytes:
+        """
+        将对象序列化为JSON字节串（优先使用orjson）
+        参数：
+            obj: 待序列化对象
+            ensure_ascii: 标准库回退时是否转义非ASCII字符；为False时仅在无法按UTF-8编码时转义
+        返回：
+            bytes: JSON数据
+        说明：
+            Linux下非UTF-8编码的文件名以代理转义字符表示，orjson拒绝序列化此类字符串，
+            此时回退到标准库并以\\uXXXX形式转义，保证索引可以正常保存和读取
+        """
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj)
+            except TypeError:
+                pass
+        # 与orjson输出一致的紧凑格式，缓存数据无循环引用，跳过循环检查
+        if not ensure_ascii:
+            try:
+                return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                                  check_circular=False).encode('utf-8')
+            except UnicodeEncodeError:
+                pass
+        return json.dumps(obj, separators=(',', ':'), check_circular=False).encode('ascii')
+
+    def _atomic_write(self, path: str, chunks):
+        """
+        原子方式写入文件：先写入同目录临时文件，完成后再替换目标文件
+        参数：
+            path: 输出文件路径
+            chunks: 依次写入的bytes片段（可为生成器）
+        说明：
+            写入过程中被中断时原文件保持完整，不会留下截断的缓存文件
+        """
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            # 写入失败或被中断时清理临时文件，原文件不受影响
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _write_json(self, path: str, obj):
+        """
+        将对象以UTF-8编码的JSON原子写入文件（优先使用orjson）
+        参数：
+            path: 输出文件路径
+            obj: 待序列化对象
+        """
+        self._atomic_write(path, (self._dumps_json(obj),))
+
+    def _write_groups(self, path: str, groups: Iterable[Tuple[str, List[str]]]):
+        """
+        逐组写出缩进格式的重复文件分组JSON（原子写入）
+        参数：
+            path: 输出文件路径
+            groups: (组ID, 文件路径列表) 的可迭代对象（可为生成器）
+        说明：
+            每次只序列化一个组，无需在内存中构建整个输出文件的内容，
+            输出格式与 json.dump(indent=2, ensure_ascii=False) 相同
+        """
+        dumps = functools.partial(self._dumps_json, ensure_ascii=False)
+
+        def chunks():
+            separator = b'{\n'
+            for group_id, group in groups:
+                yield separator + b'  ' + dumps(group_id) + b': [\n'
+                yield b',\n'.join(b'    ' + dumps(p) for p in group)
+                yield b'\n  ]'
+                separator = b',\n'
+            # 没有任何分组时输出空对象
+            yield b'{}' if separator == b'{\n' else b'\n}'
+
+        self._atomic_write(path, chunks())
+
     def _fuzzy_match(self, s1: str, s2: str) -> float:
         """
         计算两个文件名的相似度（基于Levenshtein距离算法）
         参数：
-            s1: 文件名1（自动去除扩展名）
-            s2: 文件名2（自动去除扩展名）
+            s1: 文件名1（已去除扩展名、转为小写并NFC规范化，即列数组_names中的值）
+            s2: 文件名2（同上）
         返回：
             float: 相似度比例（0.0-1.0）
         算法步骤：
-            1. 预处理：转小写并移除文件扩展名
+            1. 长度差预判：相似度上限低于阈值时直接返回0
             2. 计算最小编辑距离
             3. 转换为相似度比例
+            4. 结果按 (文件名对, 阈值) 缓存
         """
-        # 预处理：去除扩展名并转为小写
-        s1 = unicodedata.normalize('NFC', os.path.splitext(s1)[0].lower())
-        s2 = unicodedata.normalize('NFC', os.path.splitext(s2)[0].lower())
-        
-        # 确保s1长度大于等于s2
-        if len(s1) < len(s2):
-            return self._fuzzy_match(s2, s1)
+        # 确保s1长度大于等于s2，等长时按字典序排列，使(a, b)与(b, a)命中同一缓存项
+        if (len(s1), s1) < (len(s2), s2):
+            s1, s2 = s2, s1
 
+        return self._similarity_cache(s1, s2, self.similarity_threshold)
+
+    def _name_similarity(self, s1: str, s2: str, threshold: float) -> float:
+        """
+        计算两个已预处理文件名的相似度（结果经LRU缓存，见_fuzzy_match）
+        参数：
+            s1: 较长的文件名
+            s2: 较短的文件名
+            threshold: 相似度阈值，用于长度预判和有界距离计算
+        返回：
+            float: 相似度比例（0.0-1.0），确定低于阈值时返回0
+        """
         max_len = max(len(s1), len(s2))
         if max_len == 0:
             return 1.0
 
-        # 计算Levenshtein距离并转换为相似度
-        distance = self._levenshtein_distance(s1, s2)
+        # 编辑距离不小于长度差，据此得到相似度上限，低于阈值时无需计算距离
+        if 1 - (len(s1) - len(s2)) / max_len < threshold:
+            return 0.0
+
+        max_dist = self._allowed_distance(max_len, threshold)
+
+        # 计算有界Levenshtein距离，超过上限即提前终止（优先使用rapidfuzz）
+        if _Levenshtein is not None:
+            distance = _Levenshtein.distance(s1, s2, score_cutoff=max_dist)
+        elif _popcount(self._bitmap_cache(s1) ^ self._bitmap_cache(s2)) > 2 * max_dist:
+            # 字符集位图下界：每次编辑最多改变两个字符位，差异位数的一半即距离下界
+            return 0.0
+        elif len(s2) <= 64:
+            # 短文件名使用位并行算法，一个整数即可容纳整列状态
+            distance = self._myers_distance(s1, s2, max_dist)
+        else:
+            distance = self._levenshtein_distance(s1, s2, max_dist)
+        if distance > max_dist:
+            return 0.0
         return 1 - distance / max_len
 
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
+    def _allowed_distance(self, max_len: int, threshold: float) -> int:
+        """
+        计算满足阈值所允许的最大编辑距离
+        参数：
+            max_len: 两个文件名中较长者的长度
+            threshold: 相似度阈值
+        返回：
+            int: 满足 1 - 距离/max_len >= threshold 的最大距离，任何距离都不满足时返回-1
+        说明：
+            按最终相似度公式修正浮点误差，保证与逐对计算的阈值判定完全一致
+        """
+        if max_len == 0:
+            # 两个空文件名视为完全相同
+            return 0 if 1.0 >= threshold else -1
+        max_dist = int((1 - threshold) * max_len)
+        while max_dist < max_len and 1 - (max_dist + 1) / max_len >= threshold:
+            max_dist += 1
+        while max_dist > 0 and 1 - max_dist / max_len < threshold:
+            max_dist -= 1
+        if 1 - max_dist / max_len < threshold:
+            return -1
+        return max_dist
+
+    def _myers_distance(self, s1: str, s2: str, max_dist: int = None) -> int:
         """
-        动态规划实现Levenshtein编辑距离计算
+        Myers位并行算法计算Levenshtein编辑距离（适用于较短字符串）
+        参数：
+            s1: 字符串1
+            s2: 字符串2（较短者作为模式串，长度不超过64时效率最高）
+            max_dist: 距离上限，确定无法满足时提前终止
+        返回：
+            int: 编辑距离，提前终止时返回max_dist+1
+        算法说明：
+            将动态规划矩阵的一列压缩为位向量，每处理s1的一个字符
+            只需若干次整数位运算，时间复杂度：O(n)次整数运算
+        """
+        if len(s1) < len(s2):
+            s1, s2 = s2, s1
+        m = len(s2)
+        if m == 0:
+            if max_dist is not None and len(s1) > max_dist:
+                return max_dist + 1
+            return len(s1)
+
+        # 模式串中每个字符出现位置的位掩码（同一文件名与桶内其他文件比较时复用）
+        peq = self._pattern_cache(s2)
+
+        mask = (1 << m) - 1
+        last = 1 << (m - 1)
+        pv, mv = mask, 0
+        score = m
+        remaining = len(s1)
+        for c in s1:
+            eq = peq.get(c, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = (mv | ~(xh | pv)) & mask
+            mh = pv & xh
+            # 根据最后一位的水平增量更新当前距离
+            if ph & last:
+                score += 1
+            elif mh & last:
+                score -= 1
+            ph = ((ph << 1) | 1) & mask
+            mh = (mh << 1) & mask
+            pv = (mh | ~(xv | ph)) & mask
+            mv = ph & xv
+            # 每处理一个字符距离最多减少1，剩余字符不足以降到上限以内时终止
+            remaining -= 1
+            if max_dist is not None and score - remaining > max_dist:
+                return max_dist + 1
+        return score
+
+    def _pattern_masks(self, s: str) -> Dict[str, int]:
+        """
+        构建Myers算法所需的字符位置掩码表（结果经LRU缓存）
+        参数：
+            s: 模式串
+        返回：
+            dict: {字符: 该字符在模式串中出现位置的位掩码}
+        """
+        peq = {}
+        for i, c in enumerate(s):
+            peq[c] = peq.get(c, 0) | (1 << i)
+        return peq
+
+    def _char_bitmap(self, s: str) -> int:
+        """
+        构建文件名的64位字符集位图（结果经LRU缓存）
+        参数：
+            s: 文件名
+        返回：
+            int: 字符编码低6位对应的位被置1的整数
+        说明：
+            插入、删除、替换各最多改变两个位，因此
+            popcount(位图A ^ 位图B) <= 2 * 编辑距离
+        """
+        bitmap = 0
+        for c in set(s):
+            bitmap |= 1 << (ord(c) & 63)
+        return bitmap
+
+    def _levenshtein_distance(self, s1: str, s2: str, max_dist: int = None) -> int:
+        """
+        动态规划实现Levenshtein编辑距离计算（未安装rapidfuzz时的回退实现）
         参数：
             s1: 字符串1
             s2: 字符串2
+            max_dist: 距离上限，某一行最小值超过上限时提前终止
         返回：
-            int: 将s1转换为s2所需的最小操作次数
+            int: 将s1转换为s2所需的最小操作次数，提前终止时返回max_dist+1
         算法说明：
             操作包括：插入、删除、替换
-            时间复杂度：O(n*m), 空间复杂度：O(n)
+            时间复杂度：O(n*k)（k为距离上限，未指定时为O(n*m)）, 空间复杂度：O(n)
         """
+        # 确保s2为较短的字符串（原地交换，避免递归调用）
         if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
+            s1, s2 = s2, s1
+
+        # 只计算主对角线两侧max_dist宽度的带状区域：带外单元格的距离必然超过上限
+        n = len(s2)
+        limit = len(s1) if max_dist is None else max_dist
+        if len(s1) - n > limit:
+            return limit + 1
+        # 带外单元格统一记为limit+1，经过它们的路径代价都不会低于上限
+        outside = limit + 1
 
-        # 初始化动态规划矩阵（仅保留前一行和当前行）
-        previous_row = range(len(s2) + 1)
+        # 预分配前一行和当前行两个缓冲区，逐行交替使用，避免每行分配新列表
+        previous_row = array('i', (j if j <= limit else outside for j in range(n + 1)))
+        current_row = array('i', previous_row)
         for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                # 计算三种操作的代价值
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        return previous_row[-1]
+            row = i + 1
+            lo = max(1, row - limit)
+            hi = min(n, row + limit)
+            current_row[lo - 1] = row_min = row if lo == 1 else outside
+            for j in range(lo, hi + 1):
+                # 字符相同时直接继承对角值，否则取三种操作的最小代价加1
+                value = previous_row[j - 1]
+                if c1 != s2[j - 1]:
+                    if previous_row[j] < value:
+                        value = previous_row[j]
+                    if current_row[j - 1] < value:
+                        value = current_row[j - 1]
+                    value += 1
+                current_row[j] = value
+                if value < row_min:
+                    row_min = value
+            if hi < n:
+                current_row[hi + 1] = outside
+            # 每行最小值单调不减，超过上限后距离不可能再满足要求
+            if row_min > limit:
+                return limit + 1
+            previous_row, current_row = current_row, previous_row
+        return min(previous_row[n], outside)
+
+    def _length_band_pairs(self, names: List[str], threshold: float):
+        """
+        生成长度上可能满足阈值的文件名对（无相似度矩阵时使用）
+        参数：
+            names: 已规范化的文件名列表
+            threshold: 相似度阈值
+        返回：
+            生成器，产出行号对 (i, j)，i < j
+        说明：
+            编辑距离不小于长度差。按长度升序排列后，每个文件名只需向后检查到
+            相似度上限低于阈值为止，长度相差过大的文件对根本不会被枚举
+        """
+        lengths = [len(n) for n in names]
+        order = sorted(range(len(names)), key=lengths.__getitem__)
+        for a, i in enumerate(order):
+            for b in range(a + 1, len(order)):
+                j = order[b]
+                # 与_name_similarity的长度预判使用相同的计算式
+                if lengths[j] and 1 - (lengths[j] - lengths[i]) / lengths[j] < threshold:
+                    break
+                yield (i, j) if i < j else (j, i)
+
+    def _find_root(self, parent: List[int], x: int) -> int:
+        """并查集查找根节点（路径减半压缩）"""
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _component_roots(self, blocks, n: int):
+        """
+        根据分块的相似关系求连通分量（numpy向量化实现）
+        参数：
+            blocks: _similarity_blocks产出的 (起始行号, 布尔块) 序列
+            n: 文件总数
+        返回：
+            numpy.ndarray: 每行所属分量中的最小行号，与并查集的根节点一致
+        说明：
+            1. labels始终保存每行当前所属分量的最小行号
+            2. 逐行检查上三角中的相似文件，全部已在同一分量时只需一次向量比较
+            3. 需要合并时把涉及的各分量整体重标为其中的最小行号，
+               合并最多发生n-1次，每次O(n)，总耗时有确定上界
+        """
+        labels = np.arange(n)
+        for start, block in blocks:
+            for offset, row in enumerate(block):
+                i = start + offset
+                # 块的列从start开始，只取i之后的上三角部分
+                similar = np.flatnonzero(row[offset + 1:]) + (i + 1)
+                if not similar.size:
+                    continue
+                roots = labels[similar]
+                if (roots == labels[i]).all():
+                    continue
+                roots = np.unique(np.append(roots, labels[i]))
+                remap = np.arange(n)
+                remap[roots] = roots[0]
+                labels = remap[labels]
+        return labels
+
+    def _similarity_blocks(self, names: List[str], threshold: float, allowed):
+        """
+        分块计算一组文件名两两之间是否达到相似度阈值（需要rapidfuzz与numpy）
+        参数：
+            names: 已规范化的文件名列表
+            threshold: 相似度阈值
+            allowed: 允许距离表（numpy数组），下标为两个文件名中较长者的长度，
+                     长度至少覆盖names中最长的文件名（见_allowed_table）
+        返回：
+            生成器，产出 (起始行号start, 布尔块)，布尔块对应行[start, stop)与列[start, N)，
+            True表示相似度达到阈值
+        说明：
+            1. 编辑距离在rapidfuzz的C实现中多线程计算，避免Python逐对调用
+            2. 距离直接与按文件名长度查表得到的整数上限比较，阈值边界判定与
+               _name_similarity完全一致，无需构建浮点相似度矩阵
+            3. 只计算上三角所需的列，中间结果只占用 块大小*N 的内存，距离以uint8存储
+        """
+        n = len(names)
+        lengths = np.fromiter((len(name) for name in names), dtype=np.int32, count=n)
+        # 超过该距离的文件对在本桶的任何长度下都达不到阈值，rapidfuzz可提前终止计算
+        limit = max(0, int(allowed[:int(lengths.max()) + 1].max()))
+        # 超出上限的距离统一返回limit+1，上限较小时（绝大多数情况）用uint8存储
+        dtype = np.uint8 if limit < 255 else np.int32
+        # 小桶（绝大多数情况）单线程计算，启动线程池的开销远大于计算本身
+        workers = -1 if n >= 64 else 1
+
+        block = max(1, (1 << 22) // n)
+        for start in range(0, n, block):
+            stop = min(n, start + block)
+            distances = _rf_process.cdist(names[start:stop], names[start:], scorer=_Levenshtein.distance,
+                                          score_cutoff=limit, dtype=dtype, workers=workers)
+            pair_len = np.maximum(lengths[start:stop, None], lengths[None, start:])
+            yield start, distances <= allowed[pair_len]
+
+    def _allowed_table(self, allowed, max_len: int, threshold: float):
+        """
+        返回覆盖到max_len的允许距离表（numpy数组，下标为文件名长度）
+        参数：
+            allowed: 已有的允许距离表，None表示尚未构建
+            max_len: 需要覆盖的最大文件名长度
+            threshold: 相似度阈值
+        说明：
+            表只依赖阈值与长度，每次分组计算只构建一次，
+            遇到更长的文件名时按倍数扩展，避免每个桶重新逐个计算
+        """
+        if allowed is not None and max_len < len(allowed):
+            return allowed
+        size = max(max_len + 1, 256, 2 * len(allowed) if allowed is not None else 0)
+        return np.array([self._allowed_distance(length, threshold) for length in range(size)], dtype=np.int32)
 
     def _save_hash_cache(self):
         try:
-            with open('hash_cache.json', 'w') as f:
-                json.dump(self.hash_cache, f)
+            self._write_json('hash_cache.json', self.hash_cache)
         except Exception as e:
             print(f"保存哈希缓存失败: {str(e)}")
 
+    def _scan_dir(self, dirpath: str, prepare=None, exclude=None):
+        """
+        读取单个目录的内容（在线程池中执行）
+        参数：
+            dirpath: 目录路径
+            prepare: 文件名预处理函数，返回None表示过滤该文件
+            exclude: 排除目录判断函数，返回True的子目录不会被遍历
+        返回：
+            tuple: ([(预处理结果, 文件路径, 文件大小)], [子目录路径])，目录无法访问时返回None
+        说明：
+            先按文件名过滤再调用stat，被过滤的文件不产生额外系统调用
+        """
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink() and not (exclude is not None and exclude(entry.path)):
+                                subdirs.append(entry.path)
+                        else:
+                            info = prepare(entry.name) if prepare is not None else entry.name
+                            if info is not None:
+                                files.append((info, entry.path, entry.stat().st_size))
+                    except OSError:
+                        # 无法获取状态的条目（如失效的链接）直接跳过
+                        continue
+        except OSError:
+            return None
+        return files, subdirs
+
+    def _walk_files(self, root_dir: str, prepare=None, max_workers: int = 8, exclude=None):
+        """
+        基于os.scandir并行遍历目录树
+        参数：
+            root_dir: 起始目录
+            prepare: 文件名预处理/过滤函数，见_scan_dir
+            exclude: 排除目录判断函数，见_scan_dir
+            max_workers: 并行读取目录的线程数
+        返回：
+            生成器，逐目录产出 (目录路径, [(预处理结果, 文件路径, 文件大小)])
+        说明：
+            1. DirEntry携带目录枚举时获得的元数据，每个文件仅需一次stat
+               （Windows下大小直接来自目录枚举结果，无额外系统调用）
+            2. 子目录一经发现即提交线程池预读，scandir/stat期间释放GIL，
+               多个目录的系统调用延迟相互重叠
+            3. 产出顺序与os.walk相同（自顶向下先序），结果不受线程调度影响
+            4. 与os.walk一致：不进入符号链接目录，忽略无法访问的目录
+            5. 被排除的子目录在发现时即丢弃，整个子树都不会被读取
+        """
+        if exclude is not None and exclude(root_dir):
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # 已提交但尚未产出的目录读取任务 {目录路径: Future}
+            pending = {root_dir: pool.submit(self._scan_dir, root_dir, prepare, exclude)}
+            stack = [root_dir]
+            try:
+                while stack:
+                    dirpath = stack.pop()
+                    result = pending.pop(dirpath).result()
+                    if result is None:
+                        continue
+                    files, subdirs = result
+                    for sub in subdirs:
+                        pending[sub] = pool.submit(self._scan_dir, sub, prepare, exclude)
+                    yield dirpath, files
+                    # 逆序入栈，保证子目录按枚举顺序出栈
+                    stack.extend(reversed(subdirs))
+            finally:
+                # 提前终止遍历时取消尚未开始的任务
+                for future in pending.values():
+                    future.cancel()
+
     def scan_files(self, root_dirs: List[str], extensions: List[str] = None, 
                  keywords: List[str] = None, exclude_dirs: List[str] = None,
                  similarity: float = None, no_extension: List[str] = None, 
@@ -191,146 +715,92 @@ class FileDeduplicator:
             2. 遍历目录树
             3. 应用扩展名和关键词过滤
             4. 记录文件元数据
-            5. 按sorted_size排序后更新索引
+            5. 按文件大小排序后更新索引
         """
 
         # 更新相似度阈值
         if similarity is not None:
             self.similarity_threshold = similarity
 
-        # 强制完全重建文件索引
+        # 强制完全重建文件索引（保留旧索引用于判断缓存是否需要重写）
+        previous_index = self.file_index
         self.file_index = {}
+        # 列数组同步清空，扫描中止时不会残留上一次索引的分组数据
+        self._rebuild_columns()
         new_files = {}
         self.root_dirs = [os.path.abspath(d) for d in root_dirs]
         exclude_paths = [os.path.abspath(d) for d in (exclude_dirs or [])]
 
+        # 过滤参数在遍历前一次性预处理（等值匹配用frozenset，子串匹配用tuple）
+        processed_extensions = frozenset(ext.lower().lstrip('.') for ext in extensions) if extensions else frozenset()
+        normalized_keywords = tuple(unicodedata.normalize('NFC', kw.lower()) for kw in keywords) if keywords else ()
+
         # 初始化排除参数
-        no_extension = no_extension or []
-        no_keyword = no_keyword or []
-        processed_no_ext = [ext.lower().lstrip('.') for ext in no_extension]
-        normalized_no_kw = [unicodedata.normalize('NFC', kw.lower()) for kw in no_keyword]
-        for root_dir in root_dirs:
-            for dirpath, _, filenames in os.walk(root_dir):
-                # 排除路径检查
-                if any(os.path.commonpath([os.path.abspath(dirpath), ep]) == ep for ep in exclude_paths):
-                    continue
+        processed_no_ext = frozenset(ext.lower().lstrip('.') for ext in (no_extension or []))
+        normalized_no_kw = tuple(unicodedata.normalize('NFC', kw.lower()) for kw in (no_keyword or []))
+
+        def filter_name(fname):
+            """
+            对文件名应用全部过滤条件（在遍历线程中执行，先于stat调用）
+            返回：
+                str: 规范化后的小写主文件名，被过滤时返回None
+            """
+            fname = unicodedata.normalize('NFC', os.fsdecode(fname))
+
+            # 每个文件只拆分、转换小写并规范化一次，后续过滤与比较都复用该结果
+            # 文件名驻留（intern）：大量同名文件共享同一字符串对象，相等比较可直接按地址判断
+            stem, file_ext = os.path.splitext(fname)
+            name_norm = sys.intern(unicodedata.normalize('NFC', stem.lower()))
+            file_ext = file_ext.lower().lstrip('.')
+
+            # 应用扩展名过滤
+            if processed_extensions and file_ext not in processed_extensions:
+                return None
+
+            # 应用关键词过滤
+            if normalized_keywords and not any(kw in name_norm for kw in normalized_keywords):
+                return None
+
+            # 检查排除扩展名
+            if processed_no_ext and file_ext in processed_no_ext:
+                return None
+
+            # 检查排除关键词
+            if normalized_no_kw and any(kw in name_norm for kw in normalized_no_kw):
+                return None
+            return name_norm
+
+        # 排除路径前缀只计算一次；遍历从绝对路径出发，目录路径无需再转换
+        exclude_norm = frozenset(os.path.normcase(ep) for ep in exclude_paths)
+        exclude_prefixes = tuple(ep.rstrip(os.sep) + os.sep for ep in exclude_norm)
+
+        def is_excluded(dirpath):
+            """排除路径检查（前缀比较代替逐级拆分路径的commonpath，在下探子目录时执行）"""
+            norm_dirpath = os.path.normcase(dirpath)
+            return norm_dirpath in exclude_norm or norm_dirpath.startswith(exclude_prefixes)
+
+        for root_dir in self.root_dirs:
+            for dirpath, filenames in self._walk_files(root_dir, filter_name,
+                                                       exclude=is_excluded if exclude_norm else None):
                 if self.should_stop:
                     print("扫描已中止")
                     return
                 
-                for fname in filenames:
+                for name_norm, full_path, file_size in filenames:
                     if self.should_stop:
                         return
-                    fname = os.fsdecode(fname)
-                    fname = unicodedata.normalize('NFC', fname)
-                    full_path = os.path.join(dirpath, fname)
-
-                    # 跳过未修改的已记录文件
-                    if full_path in self.file_index:
-                        current_size = os.path.getsize(full_path)
-                        if current_size == self.file_index[full_path]['size']:
-                            continue
-
-                    # 应用扩展名过滤
-                    if extensions:
-                        processed_extensions = [ext.lower().lstrip('.') for ext in extensions]
-                        # 应用扩展名过滤检查
-                        if not os.path.splitext(fname)[1].lower().lstrip('.') in processed_extensions:
-                            continue
-                    
-                    # 应用关键词过滤
-                    if keywords:
-                        normalized_name = unicodedata.normalize('NFC', os.path.splitext(fname)[0].lower())
-                        normalized_keywords = [unicodedata.normalize('NFC', kw.lower()) for kw in keywords]
-                        if not any(kw in normalized_name for kw in normalized_keywords):
-                            continue
-
-                    # 排除过滤检查
-                    if no_extension or no_keyword:
-                        file_ext = os.path.splitext(fname)[1].lower().lstrip('.')
-                        file_name = os.path.splitext(fname)[0].lower()
-                    
-                    # 检查排除扩展名
-                    if no_extension:
-                        if processed_no_ext and file_ext in processed_no_ext:
-                            continue
-                        
-                    # 检查排除关键词
-                    if no_keyword:
-                        if normalized_no_kw and any(kw in file_name for kw in normalized_no_kw):
-                            continue
-                    
-                    # 记录文件元数据
-                    file_size = os.path.getsize(full_path)
-                    new_files[full_path] = {
-                        'size': file_size,
-                        'name': os.path.splitext(fname)[0].lower(),
-                        'hash': '',
-                        'sorted_size': file_size
-                    }
-
-        # 按sorted_size排序后合并到文件索引
-        sorted_files = sorted(new_files.items(), key=lambda x: x[1]['sorted_size'])
 
-        
-        # 二次过滤确保索引文件合规
-        filtered_files = {
-            k:v for k,v in sorted_files
-            if os.path.splitext(k)[1].lower().lstrip('.') not in processed_no_ext
-            and not any(kw in os.path.splitext(os.path.basename(k))[0].lower() for kw in normalized_no_kw)
-        }
+                    # 记录文件元数据（大小来自_scan_dir中DirEntry的单次stat）
+                    new_files[full_path] = FileRecord(file_size, name_norm)
 
-        
-        # 覆盖式更新文件索引
-        self.file_index = filtered_files
-        
-        start_time8 = time.perf_counter()
-        # 应用排除过滤
-        filtered_index = {}
-        for path, meta in self.file_index.items():
-            file_ext = os.path.splitext(path)[1].lower().lstrip('.')
-            file_name = os.path.splitext(os.path.basename(path))[0].lower()
-            
-            # 排除扩展名
-            if file_ext in processed_no_ext:
-                continue
-            
-            # 排除关键词
-            normalized_name = unicodedata.normalize('NFC', file_name)
-            if any(nk in normalized_name for nk in normalized_no_kw):
-                continue
-            
-            filtered_index[path] = meta
-
-        # 应用排除过滤
-        processed_no_ext = [ext.lower().lstrip('.') for ext in (no_extension or [])]
-        normalized_no_kw = [unicodedata.normalize('NFC', kw.lower()) for kw in (no_keyword or [])]
-
-        filtered_index = {}
-        for path, meta in self.file_index.items():
-            file_ext = os.path.splitext(path)[1].lower().lstrip('.')
-            file_name = os.path.splitext(os.path.basename(path))[0].lower()
-            
-            if file_ext in processed_no_ext:
-                continue
-            if any(nk in unicodedata.normalize('NFC', file_name) for nk in normalized_no_kw):
-                continue
-            
-            filtered_index[path] = meta
+        # 按文件大小排序后覆盖式更新文件索引
+        # （排除条件已在遍历时由filter_name统一应用，无需再次过滤）
+        self.file_index = dict(sorted(new_files.items(), key=lambda x: x[1].size))
+        self._rebuild_columns()
 
-        # 持久化前再次验证过滤条件
-        final_cache = {}
-        for path, meta in filtered_index.items():
-            if os.path.splitext(path)[1].lower().lstrip('.') in processed_no_ext:
-                continue
-            file_name = os.path.splitext(os.path.basename(path))[0].lower()
-            if any(nk in unicodedata.normalize('NFC', file_name) for nk in normalized_no_kw):
-                continue
-            final_cache[path] = meta
-        
-        # 持久化更新文件缓存
-        with open(self.file_cache, 'w') as f:
-            json.dump(final_cache, f)
+        # 持久化更新文件缓存（索引无变化时跳过整文件重写）
+        if self.file_index != previous_index:
+            self._save_file_index()
 
         # 扫描完成后保存哈希缓存
         self._save_hash_cache()
@@ -347,91 +817,138 @@ class FileDeduplicator:
             list: 已删除文件路径列表
         交互流程：
             1. 显示重复文件列表
-            2. 用户选择(y/N/q)
-            3. 执行删除并更新缓存
+            2. 用户选择(y/N/q)，只收集待删除文件
+            3. 交互结束后并行执行删除，统一更新缓存
+        中断处理：
+            q退出时仍删除此前已确认的分组；收到中断信号（Ctrl+C）后
+            不再删除任何尚未删除的文件，已提交线程池的任务也会直接跳过
         """
         deleted_files = []
-        for group_id, group in duplicates.items():
-            if self.should_stop:
-                return deleted_files
+        stopped = False
+        # 哈希缓存在全部删除结束后统一保存一次（包括中途退出或输入异常），而不是每删除一个文件重写一次
+        try:
+            # 第一阶段：逐组确认，只收集待删除文件，不在交互过程中执行删除
+            to_delete = []
+            for group_id, group in duplicates.items():
+                if self.should_stop:
+                    stopped = True
+                    break
             
-            if len(group) > 1:
-                if confirm:
-                    print(f"\n发现重复组 ({len(group)} 个文件):")
-                    print("\n".join(f"[{i+1}] {path}" for i, path in enumerate(group)))
-                    print(f"请选择操作：[y]保留第一个/[n]保留全部/[数字]指定保留（多个逗号分隔）/q退出：")
-                    choice = input("请输入操作选择: ").strip().lower()
+                if len(group) > 1:
+                    if confirm:
+                        # 分组标题、文件列表与操作提示合并为一次输出
+                        listing = "\n".join(f"[{i}] {path}" for i, path in enumerate(group, 1))
+                        print(f"\n发现重复组 ({len(group)} 个文件):\n{listing}\n"
+                              f"请选择操作：[y]保留第一个/[n]保留全部/[数字]指定保留（多个逗号分隔）/q退出：")
+                        choice = input("请输入操作选择: ").strip().lower()
                     
-                    if choice == 'q':
-                        self.should_stop = True
-                        return deleted_files
+                        if choice == 'q':
+                            # 退出前仍删除已确认的分组（停止标志在删除完成后再设置，
+                            # 否则删除线程会将其视为中断而跳过）
+                            stopped = True
+                            break
                     
-                    # 处理不同输入模式
-                    keep_indices = set()
-                    if choice == 'y':
-                        keep_indices = {0}
-                    elif choice == 'n':
-                        keep_indices = set(range(len(group)))
-                    elif choice.isdigit() or ',' in choice:
-                        try:
-                            keep_indices = {max(0, int(i)-1) for i in choice.split(',')}
-                            keep_indices = {idx for idx in keep_indices if 0 <= idx < len(group)}
-                        except:
-                            print("输入格式错误，将保留第一个文件")
+                        # 处理不同输入模式
+                        keep_indices = set()
+                        if choice == 'y':
+                            keep_indices = {0}
+                        elif choice == 'n':
+                            keep_indices = set(range(len(group)))
+                        elif choice.isdigit() or ',' in choice:
+                            try:
+                                keep_indices = {max(0, int(i)-1) for i in choice.split(',')}
+                                keep_indices = {idx for idx in keep_indices if 0 <= idx < len(group)}
+                            except:
+                                print("输入格式错误，将保留第一个文件")
+                                keep_indices = {0}
+                        else:
+                            print("输入无效，将保留第一个文件")
                             keep_indices = {0}
                     else:
-                        print("输入无效，将保留第一个文件")
+                        # 自动模式直接保留第一个
                         keep_indices = {0}
-                else:
-                    # 自动模式直接保留第一个
-                    keep_indices = {0}
                 
-                # 删除未保留文件
-                for idx, path in enumerate(group):
-                    if idx not in keep_indices:
-                            try:
-                                # 修改文件属性移除只读
-                                if os.path.exists(path):
-                                    os.chmod(path, 0o777)
-                                # 创建快捷方式逻辑
-                                if self.link_mode and keep_indices:
-                                    first_kept = group[min(keep_indices)]
-                                    if os.path.exists(first_kept):
-                                        link_path = path + '.lnk'
-                                        self._create_shortcut(first_kept, path)
-                                # 带重试的删除逻辑
-                                max_retries = 3
-                                for attempt in range(max_retries):
-                                    try:
-                                        os.remove(path)
-                                        break
-                                    except PermissionError as pe:
-                                        if attempt < max_retries - 1:
-                                            time.sleep(0.5)
-                                            continue
-                                        raise
-                                deleted_files.append(path)
-                                if path in self.file_index:
-                                    del self.file_index[path]
-                                # 新增哈希缓存清理
-                                if path in self.hash_cache:
-                                    del self.hash_cache[path]
-                                self._save_hash_cache()  # 保存缓存更新
-                            except Exception as e:
-                                print(f"删除文件失败 {path}: {str(e)}")
+                    # 记录未保留文件及其对应的保留文件（用于创建快捷方式）
+                    first_kept = group[min(keep_indices)] if keep_indices else None
+                    to_delete.extend((path, first_kept) for idx, path in enumerate(group)
+                                     if idx not in keep_indices)
+
+            # 创建快捷方式逻辑（COM调用留在主线程中执行，中断后文件不会被删除，无需创建）
+            if self.link_mode and not self.should_stop:
+                for path, first_kept in to_delete:
+                    if first_kept is not None and os.path.exists(first_kept):
+                        self._create_shortcut(first_kept, path)
+
+            # 第二阶段：并行删除，重试等待在各线程中进行，不再串行阻塞
+            paths = [path for path, _ in to_delete]
+            if len(paths) > 1:
+                with ThreadPoolExecutor(max_workers=min(len(paths), 8)) as pool:
+                    removed = list(pool.map(self._remove_file, paths))
+            else:
+                removed = [self._remove_file(path) for path in paths]
+            deleted_files = [path for path, ok in zip(paths, removed) if ok]
+            if stopped:
+                self.should_stop = True
+            # 删除过程中收到中断信号时同样不再重新计算分组
+            stopped = self.should_stop
+
+            for path in deleted_files:
+                if path in self.file_index:
+                    # 行号从分组中移除即可，列数组在下次扫描时重建
+                    row = self._rows.pop(path)
+                    self._by_size[self._sizes[row]].remove(row)
+                    del self.file_index[path]
+                # 新增哈希缓存清理
+                if path in self.hash_cache:
+                    del self.hash_cache[path]
+        finally:
+            self._save_hash_cache()
+        if stopped:
+            return deleted_files
+
+        # 没有文件被删除时索引未变化，无需重写缓存和重新计算
+        if not deleted_files:
+            return deleted_files
 
         # 更新持久化存储
-        with open(self.file_cache, 'w') as f:
-            json.dump(self.file_index, f)
+        self._save_file_index()
 
-        # 扫描完成后保存哈希缓存
-        self._save_hash_cache()
         # 重新计算重复文件组
         new_duplicates = self.calculate_similarity(self.similarity_threshold)
-        with open(self.duplicate_cache, 'w', encoding='utf-8') as f:
-            json.dump(self.duplicate_index, f)
+        self._write_json(self.duplicate_cache, self.duplicate_index)
         return deleted_files
 
+    def _remove_file(self, path: str) -> bool:
+        """
+        删除单个文件（在线程池中执行）
+        参数：
+            path: 文件路径
+        返回：
+            bool: 是否删除成功
+        说明：
+            1. 只有删除因权限失败时才移除只读属性并重试，正常文件不产生额外的chmod调用
+            2. 每次删除前检查中断标志，Ctrl+C后尚未执行的删除直接跳过
+        """
+        # 带重试的删除逻辑
+        max_retries = 3
+        try:
+            for attempt in range(max_retries):
+                if self.should_stop:
+                    return False
+                try:
+                    os.remove(path)
+                    return True
+                except PermissionError:
+                    if attempt == max_retries - 1:
+                        raise
+                    # 修改文件属性移除只读
+                    os.chmod(path, 0o777)
+                    if attempt > 0:
+                        time.sleep(0.5)
+        except Exception as e:
+            print(f"删除文件失败 {path}: {str(e)}")
+        return False
+
     def calculate_similarity(self, threshold: float) -> Dict[str, List[str]]:
         """
         计算文件相似度并分组
@@ -439,123 +956,303 @@ class FileDeduplicator:
             threshold: 相似度阈值
         返回：
             dict: 分组字典 {组ID: 文件路径列表}
-        优化策略：
-            1. 按sorted_size排序减少比较范围
-            2. 仅比较相邻±10%范围的文件
-            3. 添加根目录一致性检查
+        说明：
+            分组逻辑见_iter_groups，这里按产出顺序编号
         """
+        return {f"group_{i}": group for i, group in enumerate(self._iter_groups(threshold), 1)}
 
+    def _iter_groups(self, threshold: float) -> Iterator[List[str]]:
+        """
+        逐个产出重复文件分组（由calculate_similarity按顺序编号收集为字典）
+        参数：
+            threshold: 相似度阈值
+        返回：
+            生成器，每次产出一个文件路径列表
+        优化策略：
+            1. 按文件大小分桶，仅在同尺寸桶内比较（尺寸相同是重复的前提）；
+               旧版本的 size*1 ~ size/1 二分窗口实际上也只命中大小完全相同的文件，
+               并不存在大小容差，改为哈希分桶后结果不变
+            2. 大桶分块批量计算相似关系，小桶逐对比较
+            3. 合并相似文件对（分块求连通分量或并查集），A~B且B~C时三者归入同一组
+            4. 可选哈希校验确认内容一致（先比较首尾指纹，一致时再计算完整哈希），
+               按哈希值拆分候选分组，相似链中内容不同的文件不会连累其余重复文件
+        """
         self.similarity_threshold = threshold
-        groups = {}
-        seen = set()
-        
-        # 按 sorted_size 排序后的文件列表
-        sorted_files = sorted(self.file_index.items(), key=lambda x: x[1]['sorted_size'])
-        # 提取所有文件的大小，用于二分搜索
-        sizes = [data['sorted_size'] for _, data in sorted_files]
-        
-        for i, (path, data) in enumerate(sorted_files):
-            if path in seen:
+        groups = self._iter_candidates(threshold)
+        return self._iter_verified(groups) if self.hash_check else groups
+
+    def _iter_candidates(self, threshold: float) -> Iterator[List[str]]:
+        """
+        逐个产出按文件大小与文件名相似度得到的候选分组（未经哈希校验）
+        参数：
+            threshold: 相似度阈值
+        返回：
+            生成器，每次产出一个至少包含两个文件的路径列表
+        """
+        # 分块矩阵路径使用的允许距离表，在首个大桶时构建并在本次计算中复用
+        allowed = None
+
+        # 直接使用扫描时维护的大小索引分桶，从列数组中按行号取值
+        for rows in self._by_size.values():
+            # 单个文件的桶不可能存在重复
+            if len(rows) < 2:
                 continue
-            
-            group = [path]
-            si = data['sorted_size']
-            
-            # 计算尺寸范围
-            lower = si * 1  # Si * (1 - 0.05)
-            upper = si / 1  # Si / (1 - 0.05)
-            
-            # 使用二分搜索找到满足尺寸范围的索引
-            j = bisect_left(sizes, lower)
-            k = bisect_right(sizes, upper)
-            
-            # 检查范围 [j, k) 内的文件
-            for idx in range(j, k):
-                other_path, other_data = sorted_files[idx]
-                if path != other_path and other_path not in seen:
-                    # 可选：如果 file_index 已确保文件存在，则移除此检查
-                    if os.path.exists(other_path):
-                        # 直接检查模糊匹配，因为尺寸条件已由范围保证
-                        if self._fuzzy_match(data['name'], other_data['name']) >= threshold:
-                            group.append(other_path)
-                            seen.add(other_path)
-            
+            # 每个文件只检查一次是否仍然存在，而不是每个文件对各检查一次
+            bucket = [(self._paths[row], self._names[row]) for row in rows
+                      if os.path.exists(self._paths[row])]
+            if len(bucket) < 2:
+                continue
+
+            # 同一桶内的文件批量计算相似关系
+            names = [name for _, name in bucket]
+            distinct = len(set(names))
+            n = len(bucket)
+            # 分块矩阵每个桶有固定的cdist与numpy开销，实测约20~30个文件以下时逐对比较
+            # （rapidfuzz单次调用）更快，而真实目录中绝大多数桶只有2~3个文件
+            use_matrix = _rf_process is not None and _Levenshtein is not None and n >= 24
+
+            if distinct == 1:
+                # 文件名全部相同时整个桶就是一组，无需逐对合并
+                roots = [0] * n
+            elif use_matrix:
+                # 分块计算相似关系并在numpy中求连通分量，无需逐对执行Python层的并查集合并
+                allowed = self._allowed_table(allowed, max(map(len, names)), threshold)
+                roots = self._component_roots(self._similarity_blocks(names, threshold, allowed), n).tolist()
+            else:
+                # 并查集合并，根节点取较小行号以保持桶内原有顺序
+                parent = list(range(n))
+                for i, j in self._length_band_pairs(names, threshold):
+                    root_i = self._find_root(parent, i)
+                    root_j = self._find_root(parent, j)
+                    # 已在同一组内的文件对无需再比较
+                    if root_i == root_j:
+                        continue
+                    # 文件名完全相同时直接判定，跳过模糊匹配
+                    if names[i] != names[j] and self._fuzzy_match(names[i], names[j]) < threshold:
+                        continue
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+                roots = [self._find_root(parent, row) for row in range(n)]
+
+            # 按根节点收集分组
+            components = defaultdict(list)
+            for row, root in enumerate(roots):
+                components[root].append(bucket[row][0])
+
             # 记录有效分组
-            if len(group) > 1:
-                if self.hash_check:
-                    # 检查组内文件大小是否一致
-                    group_sizes = {self.file_index[path]['sorted_size'] for path in group}
-                    if len(group_sizes) != 1:
-                        continue  # 大小不一致，跳过哈希校验
-
-                    # 哈希校验
-                    base_hash = None
-                    same_hash = True
-                    for file_path in group:
-                        current_hash = self._calculate_hash(file_path)
-                        if current_hash is None:  # 文件读取失败
-                            same_hash = False
-                            break
-                        if base_hash is None:
-                            base_hash = current_hash
-                        elif current_hash != base_hash:
-                            same_hash = False
-                            break
-                    if same_hash:
-                        group_id = f"group_{len(groups) + 1}"
-                        groups[group_id] = group
-                    #groups[f"group_{len(groups)+1}"] = group
-        return groups
+            yield from (group for group in components.values() if len(group) > 1)
 
-    def export_duplicates(self, duplicates: Dict[str, List[str]], output_file: str, hash_check=False):
+    def _iter_verified(self, groups: Iterable[List[str]]) -> Iterator[List[str]]:
+        """
+        对候选分组做哈希校验，按原顺序逐个产出内容一致的子分组
+        参数：
+            groups: 候选分组（组内文件大小相同）的可迭代对象
+        返回：
+            生成器，每次产出一个按哈希值拆分后至少包含两个文件的路径列表
+        说明：
+            候选分组先累积到约4096个文件，再跨组批量提交线程池（见_split_groups），
+            避免每组单独调度，同时内存中只保留当前这一批分组
+        """
+        pending = []
+        pending_files = 0
+        for group in groups:
+            pending.append(group)
+            pending_files += len(group)
+            if pending_files >= 4096:
+                for subgroups in self._split_groups(pending):
+                    yield from subgroups
+                pending, pending_files = [], 0
+        for subgroups in self._split_groups(pending):
+            yield from subgroups
+
+    def export_duplicates(self, duplicates: Union[Dict[str, List[str]], Iterable[List[str]]],
+                          output_file: str, hash_check=False):
         """
         导出重复文件列表到JSON文件
         参数：
-            duplicates: 重复文件分组字典
+            duplicates: 重复文件分组字典，或逐个产出分组的可迭代对象（如_iter_groups）
             output_file: 输出文件路径
             hash_check: 是否进行哈希校验
         返回：
             bool: 是否导出成功
+        说明：
+            传入可迭代对象时分组按产出顺序编号为group_N，边计算边写出，
+            全部分组不会同时保存在内存中；此时duplicate_index保持为空，
+            之后需要删除文件时应传入calculate_similarity返回的字典
         """
+        # 先清空旧结果，导出失败时不会残留上一次的分组
+        self.duplicate_index = {}
         try:
+            if not isinstance(duplicates, dict):
+                groups = duplicates
+                if hash_check:
+                    # 逐批校验，仍然只在内存中保留当前一批分组
+                    existing = ([path for path in group if os.path.exists(path)] for group in groups)
+                    groups = self._iter_verified(files for files in existing if len(files) > 1)
+                self._write_groups(output_file, ((f"group_{i}", group) for i, group in enumerate(groups, 1)))
+                # 输出文件即重复缓存时无需重复写入；否则分组已无法再次获取，直接复制输出文件
+                if os.path.abspath(output_file) != os.path.abspath(self.duplicate_cache):
+                    with open(output_file, 'rb') as f:
+                        self._atomic_write(self.duplicate_cache, iter(lambda: f.read(1 << 20), b''))
+                return True
+
             # 执行哈希校验
             if hash_check:
-                valid_duplicates = {}
+                candidates = []
                 for group_id, group in duplicates.items():
-                    hashes = set()
-                    valid_files = []
-                    for path in group:
-                        if os.path.exists(path):
-                            hashes.add(self._calculate_hash(path))
-                            valid_files.append(path)
-                    # 仅保留哈希值一致的有效分组
-                    if len(hashes) == 1 and len(valid_files) > 1:
-                        valid_duplicates[group_id] = valid_files
-                duplicates = valid_duplicates
+                    valid_files = [path for path in group if os.path.exists(path)]
+                    if len(valid_files) > 1:
+                        candidates.append((group_id, valid_files))
+                # 所有分组一次性批量校验，按哈希值拆分为内容一致的子分组
+                # （第一个子分组沿用原组ID，其余依次追加序号后缀）
+                split = self._split_groups([files for _, files in candidates])
+                duplicates = {}
+                for (group_id, _), subgroups in zip(candidates, split):
+                    for k, files in enumerate(subgroups, 1):
+                        duplicates[group_id if k == 1 else f"{group_id}_{k}"] = files
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(duplicates, f, indent=2, ensure_ascii=False)
-            # 更新内存中的重复索引
+            # 更新内存中的重复索引（在写入文件之前，与写入是否成功无关）
             self.duplicate_index = duplicates
-            with open(self.duplicate_cache, 'w', encoding='utf-8') as f:
-                json.dump(self.duplicate_index, f)
+            self._write_groups(output_file, duplicates.items())
+            # 输出文件即重复缓存时无需重复写入
+            if os.path.abspath(output_file) != os.path.abspath(self.duplicate_cache):
+                self._write_json(self.duplicate_cache, self.duplicate_index)
             return True
         except Exception as e:
             print(f"导出失败: {str(e)}")
             return False
         
+    def _split_groups(self, groups: List[List[str]]) -> List[List[List[str]]]:
+        """
+        批量将多组（组内大小相同的）候选文件按内容拆分
+        参数：
+            groups: 文件路径列表的列表
+        返回：
+            List[List[List[str]]]: 与groups顺序一致，每项为该组内哈希值相同且
+            至少包含两个文件的子分组列表（保持组内原有文件顺序）
+        校验流程：
+            1. 文件大小一致已由调用方保证
+            2. 按首尾各64 KiB的指纹拆分，指纹唯一的文件无需读取整个文件
+            3. 拆分后的子分组再按完整MD5哈希拆分
+            4. 每个阶段所有分组的文件一次性提交线程池
+        """
+        split = [[group] for group in groups]
+        for func in (self._calculate_fingerprint, self._calculate_hash):
+            digests = iter(self._hash_files([path for subgroups in split
+                                             for subgroup in subgroups for path in subgroup], func))
+            for k, subgroups in enumerate(split):
+                refined = []
+                for subgroup in subgroups:
+                    by_digest = defaultdict(list)
+                    for path in subgroup:
+                        digest = next(digests)
+                        # 读取失败（返回空字符串）的文件不归入任何子分组
+                        if digest:
+                            by_digest[digest].append(path)
+                    refined.extend(files for files in by_digest.values() if len(files) > 1)
+                split[k] = refined
+        return split
+
+    def _hash_files(self, paths: List[str], func=None) -> List[str]:
+        """
+        并行计算一组文件的哈希值
+        参数：
+            paths: 文件路径列表
+            func: 单文件哈希函数，默认为_calculate_hash
+        返回：
+            List[str]: 与paths顺序一致的哈希值列表（读取失败的文件为空字符串）
+        说明：
+            哈希计算以磁盘读取为主，hashlib处理大块数据时会释放GIL，
+            多线程可以同时发起多个读取请求
+        """
+        func = func or self._calculate_hash
+        if len(paths) < 2:
+            return [func(path) for path in paths]
+        # 线程池在首次使用时创建并在整个实例生命周期内复用，避免每组重复创建线程
+        workers = (os.cpu_count() or 1) * 2
+        if self._hash_executor is None:
+            self._hash_executor = ThreadPoolExecutor(max_workers=workers)
+        # 按线程数切分为连续的任务块，每块只调度一次，小文件不会被调度开销拖慢
+        size = -(-len(paths) // workers)
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        results = self._hash_executor.map(lambda chunk: [func(path) for path in chunk], chunks)
+        return [digest for chunk in results for digest in chunk]
+
+    def _hash_entry(self, file_path: str) -> dict:
+        """
+        获取文件的哈希缓存项（按文件大小和修改时间校验）
+        参数：
+            file_path: 文件路径
+        返回：
+            dict: {'size', 'mtime_ns', 以及已计算的'fingerprint'/'hash'}，文件无法访问时返回None
+        说明：
+            文件大小或修改时间变化后旧的哈希结果自动失效，避免返回过期哈希
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError as e:
+            print(f"计算文件哈希失败 {file_path}: {str(e)}")
+            return None
+        entry = self.hash_cache.get(file_path)
+        if (not isinstance(entry, dict) or entry.get('size') != st.st_size
+                or entry.get('mtime_ns') != st.st_mtime_ns):
+            entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            self.hash_cache[file_path] = entry
+        return entry
+
+    def _calculate_fingerprint(self, file_path: str) -> str:
+        """
+        计算文件首尾各64 KiB内容的MD5指纹
+        参数：
+            file_path: 文件路径
+        返回：
+            str: 指纹值，读取失败时返回空字符串
+        说明：
+            不超过128 KiB的文件指纹即为完整内容的哈希，同时记录为完整哈希
+        """
+        entry = self._hash_entry(file_path)
+        if entry is None:
+            return ""
+        if 'fingerprint' in entry:
+            return entry['fingerprint']
+
+        block = 1 << 16
+        try:
+            with open(file_path, "rb") as f:
+                hash_md5 = hashlib.md5(f.read(block))
+                if entry['size'] > 2 * block:
+                    f.seek(-block, os.SEEK_END)
+                    hash_md5.update(f.read(block))
+                else:
+                    hash_md5.update(f.read())
+            fingerprint = hash_md5.hexdigest()
+        except Exception as e:
+            print(f"计算文件哈希失败 {file_path}: {str(e)}")
+            return ""
+        entry['fingerprint'] = fingerprint
+        if entry['size'] <= 2 * block:
+            entry['hash'] = fingerprint
+        return fingerprint
+
     def _calculate_hash(self, file_path: str) -> str:
         """计算文件的MD5哈希值"""
-        if file_path in self.hash_cache:
-            return self.hash_cache[file_path]
+        entry = self._hash_entry(file_path)
+        if entry is None:
+            return ""
+        if 'hash' in entry:
+            return entry['hash']
         
-        hash_md5 = hashlib.md5()
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
+                if hasattr(hashlib, 'file_digest'):
+                    # Python 3.11+：C实现的读取循环，读取期间释放GIL
+                    hash_md5 = hashlib.file_digest(f, 'md5')
+                else:
+                    hash_md5 = hashlib.md5()
+                    # 1 MiB分块读取，减少Python层循环次数
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        hash_md5.update(chunk)
             file_hash = hash_md5.hexdigest()
-            self.hash_cache[file_path] = file_hash
+            entry['hash'] = file_hash
             return file_hash
         except Exception as e:
             print(f"计算文件哈希失败 {file_path}: {str(e)}")
@@ -591,6 +1288,9 @@ def main():
     
 
     dedup = FileDeduplicator(hash_check=args.hash_check, link_mode=args.link)
+    # 注册Ctrl+C信号处理器（仅命令行模式，作为库使用时不接管调用方的信号处理）
+    import signal
+    signal.signal(signal.SIGINT, dedup._handle_interrupt)
     root_dirs = [os.path.abspath(d) for d in args.directories]
     print(f"输入的目录参数: {args.directories}")
     for d in root_dirs:
@@ -600,33 +1300,52 @@ def main():
     dedup.scan_files(root_dirs, args.extensions, args.keywords, no_keyword=args.nokeyword, no_extension=args.noextension, similarity=args.threshold)
     end_time1 = time.perf_counter()
     time_part1 = end_time1 - start_time1
+    # 处理结果输出（默认保存到重复缓存）
+    output_file = args.output or dedup.duplicate_cache
+
+    def printed(groups):
+        """导出时逐组输出到终端"""
+        for group in groups:
+            sys.stdout.write("\n".join(group) + "\n")
+            yield group
+
     print("正在分析重复文件...")
     start_time2 = time.perf_counter()
-    results = dedup.calculate_similarity(args.threshold)
+    if args.delete:
+        # 删除操作需要完整的分组字典
+        results = dedup.calculate_similarity(args.threshold)
+    else:
+        # 不删除文件时无需保留全部分组：分组由_iter_groups逐个产出，同时输出并写入文件
+        # （_iter_groups已按hash_check校验，导出时无需重复校验）
+        if args.output:
+            print(f"正在导出结果到 {args.output}...")
+        print("\n发现重复文件组:")
+        exported = dedup.export_duplicates(printed(dedup._iter_groups(args.threshold)), output_file)
     end_time2 = time.perf_counter()
     time_part2 = end_time2 - start_time2
 
     start_time3 = time.perf_counter()
-    # 处理结果输出
-    if args.output:
-        print(f"正在导出结果到 {args.output}...")
-        dedup.export_duplicates(results, args.output, args.hash_check)
-    else:
-        # 默认保存到重复缓存
-        dedup.export_duplicates(results, dedup.duplicate_cache, args.hash_check)
-    
-    # 更新为校验后的结果
-    results = dedup.duplicate_index
-    
-    print("\n发现重复文件组:")                                                                                 
-    for group in results.values():
-        print("\n".join(group))
-    
-    # 执行删除操作
     if args.delete:
+        if args.output:
+            print(f"正在导出结果到 {args.output}...")
+        exported = dedup.export_duplicates(results, output_file, args.hash_check)
+        # 更新为校验后的结果
+        results = dedup.duplicate_index
+
+        # 所有分组拼接后一次性写出，避免逐组逐行触发终端输出
+        print("\n发现重复文件组:")
+        sys.stdout.write("".join("\n".join(group) + "\n" for group in results.values()))
+
+    # 执行删除操作（导出失败时不删除任何文件）
+    if args.delete and exported:
         print("正在删除重复文件...")
         deleted = dedup.delete_duplicates(results, confirm=not args.yes)
         print(f"已删除 {len(deleted)} 个重复文件")
+    else:
+        if args.delete:
+            print("结果导出失败，已跳过删除操作")
+        # 保存分组校验阶段计算的哈希（删除流程结束时已自行保存）
+        dedup._save_hash_cache()
 
     end_time3 = time.perf_counter()
     time_part3 = end_time3 - start_time3
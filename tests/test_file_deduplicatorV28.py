@@ -0,0 +1,228 @@
+"""
+file_deduplicatorV28 编辑距离与分组算法的参考校验
+说明：
+    以朴素动态规划为参考实现，随机生成文件名对比：
+    1. 带状DP（_levenshtein_distance）与Myers位并行算法（_myers_distance），含/不含距离上限
+    2. 依赖rapidfuzz与numpy的分块矩阵分组路径与纯Python回退路径的分组结果
+    另含哈希校验拆分分组与删除流程（q退出、输入结束、中断）的回归用例
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_deduplicatorV28 as dd
+
+
+def reference_distance(s1, s2):
+    """朴素O(n*m)动态规划，作为编辑距离的参考结果"""
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+def random_pair(rng):
+    """随机生成一对文件名：一部分由编辑操作派生，一部分完全随机"""
+    alphabet = rng.choice(['ab', 'abc', 'abcdefgh', '长文件名'])
+    s1 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, rng.choice([5, 20, 70]))))
+    if rng.random() < 0.3:
+        s2 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+    else:
+        chars = list(s1)
+        for _ in range(rng.randint(0, 6)):
+            op = rng.random()
+            if op < 0.33 and chars:
+                chars.pop(rng.randrange(len(chars)))
+            elif op < 0.66:
+                chars.insert(rng.randint(0, len(chars)), rng.choice(alphabet))
+            elif chars:
+                chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+        s2 = ''.join(chars)
+    return s1, s2
+
+
+class DeduplicatorTestCase(unittest.TestCase):
+    """在临时目录中运行，避免读写当前目录下的缓存文件"""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.dedup = dd.FileDeduplicator()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+
+class DistanceTest(DeduplicatorTestCase):
+
+    def check(self, func, max_len=None):
+        rng = random.Random(0)
+        for _ in range(3000):
+            s1, s2 = random_pair(rng)
+            if max_len is not None and min(len(s1), len(s2)) > max_len:
+                continue
+            expected = reference_distance(s1, s2)
+            for max_dist in (None, 0, 1, 2, 3, 5, 8, 30):
+                bounded = expected if max_dist is None or expected <= max_dist else max_dist + 1
+                self.assertEqual(func(s1, s2, max_dist), bounded, (s1, s2, max_dist))
+
+    def test_banded_levenshtein(self):
+        self.check(self.dedup._levenshtein_distance)
+
+    def test_myers(self):
+        # Myers算法要求较短的字符串不超过64个字符
+        self.check(self.dedup._myers_distance, max_len=64)
+
+
+class GroupingTest(DeduplicatorTestCase):
+
+    def build_tree(self, rng):
+        names = set()
+        while len(names) < 300:
+            stem = ''.join(rng.choice('abcd') for _ in range(rng.randint(2, 10)))
+            names.add(f'{stem}{rng.choice(["", "1", "_x"])}.txt')
+        root = os.path.join(self._tmp.name, 'data')
+        os.makedirs(root)
+        for name in sorted(names):
+            # 只有三种文件大小，使每个大小桶包含足够多的文件
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(b'x' * rng.randint(1, 3))
+        return root
+
+    def groups(self, threshold):
+        return sorted(sorted(group) for group in self.dedup.calculate_similarity(threshold).values())
+
+    @unittest.skipIf(dd.np is None or dd._rf_process is None or dd._Levenshtein is None,
+                     'rapidfuzz/numpy未安装')
+    def test_matrix_matches_fallback(self):
+        root = self.build_tree(random.Random(1))
+        self.dedup.scan_files([root])
+        for threshold in (0.5, 0.6, 0.7, 0.8):
+            matrix_groups = self.groups(threshold)
+            with mock.patch.object(dd, '_rf_process', None), mock.patch.object(dd, '_Levenshtein', None):
+                self.dedup._similarity_cache.cache_clear()
+                fallback_groups = self.groups(threshold)
+            self.dedup._similarity_cache.cache_clear()
+            self.assertEqual(matrix_groups, fallback_groups, threshold)
+
+
+class HashCheckTest(DeduplicatorTestCase):
+
+    def write(self, relpath, data):
+        path = os.path.join(self._tmp.name, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def build_chain(self):
+        """photo~photo1~photo12 相似链，只有前两个文件内容相同"""
+        photo = self.write('b/photo.jpg', b'AAAA')
+        photo1 = self.write('b/photo1.jpg', b'AAAA')
+        self.write('a/photo12.jpg', b'BBBB')
+        self.dedup.scan_files([os.path.join(self._tmp.name, d) for d in ('a', 'b')])
+        return [photo, photo1]
+
+    def test_chain_is_split_by_hash(self):
+        expected = self.build_chain()
+        self.dedup.hash_check = True
+        self.assertEqual(list(self.dedup.calculate_similarity(0.8).values()), [expected])
+
+    def test_export_splits_by_hash(self):
+        expected = self.build_chain()
+        duplicates = self.dedup.calculate_similarity(0.8)
+        self.assertEqual([sorted(group) for group in duplicates.values()],
+                         [sorted(expected + [os.path.join(self._tmp.name, 'a', 'photo12.jpg')])])
+        self.assertTrue(self.dedup.export_duplicates(duplicates, 'out.json', hash_check=True))
+        self.assertEqual(list(self.dedup.duplicate_index.values()), [expected])
+
+    def test_streamed_export_matches_dict(self):
+        self.build_chain()
+        self.dedup.hash_check = True
+        self.assertTrue(self.dedup.export_duplicates(self.dedup.calculate_similarity(0.8), 'dict.json'))
+        self.assertTrue(self.dedup.export_duplicates(self.dedup._iter_groups(0.8), 'stream.json'))
+        # 逐组导出时不在内存中保留分组字典，重复缓存由输出文件复制得到
+        self.assertEqual(self.dedup.duplicate_index, {})
+        with open('dict.json', 'rb') as f1, open('stream.json', 'rb') as f2, \
+                open(self.dedup.duplicate_cache, 'rb') as f3:
+            expected = f1.read()
+            self.assertEqual(f2.read(), expected)
+            self.assertEqual(f3.read(), expected)
+
+
+class DeleteTest(DeduplicatorTestCase):
+
+    def build_groups(self, count):
+        duplicates = {}
+        for k in range(count):
+            group = []
+            for d in ('a', 'b'):
+                path = os.path.join(self._tmp.name, d, f'file{k}.txt')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(str(k).encode())
+                group.append(path)
+            duplicates[f'group_{k + 1}'] = group
+        return duplicates
+
+    def delete(self, duplicates, answers=None, confirm=True):
+        with mock.patch('builtins.input', side_effect=answers), contextlib.redirect_stdout(io.StringIO()):
+            return self.dedup.delete_duplicates(duplicates, confirm=confirm)
+
+    def existing(self, duplicates):
+        return [path for group in duplicates.values() for path in group if os.path.exists(path)]
+
+    def test_quit_deletes_confirmed_groups(self):
+        duplicates = self.build_groups(3)
+        deleted = self.delete(duplicates, ['y', 'q'])
+        self.assertEqual(deleted, [duplicates['group_1'][1]])
+        self.assertEqual(len(self.existing(duplicates)), 5)
+        self.assertTrue(self.dedup.should_stop)
+
+    def test_eof_deletes_nothing(self):
+        duplicates = self.build_groups(3)
+        with self.assertRaises(EOFError):
+            self.delete(duplicates, ['y', EOFError])
+        self.assertEqual(len(self.existing(duplicates)), 6)
+        # 输入异常时哈希缓存仍会保存
+        self.assertTrue(os.path.exists('hash_cache.json'))
+
+    def test_interrupt_during_confirmation(self):
+        duplicates = self.build_groups(3)
+
+        def answer(prompt):
+            self.dedup._handle_interrupt(None, None)
+            return 'y'
+
+        self.assertEqual(self.delete(duplicates, answer), [])
+        self.assertEqual(len(self.existing(duplicates)), 6)
+
+    def test_interrupt_during_removal(self):
+        duplicates = self.build_groups(40)
+        remove = os.remove
+
+        def interrupted_remove(path):
+            self.dedup._handle_interrupt(None, None)
+            remove(path)
+
+        with mock.patch.object(dd.os, 'remove', side_effect=interrupted_remove):
+            deleted = self.delete(duplicates, confirm=False)
+        # 中断前已通过检查的删除任务最多与线程数相同，其余文件全部保留
+        self.assertLessEqual(len(deleted), 8)
+        self.assertEqual(len(self.existing(duplicates)), 80 - len(deleted))
+
+
+if __name__ == '__main__':
+    unittest.main()